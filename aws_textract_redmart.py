@@ -1,17 +1,53 @@
 """ Demonstration of AWS Textract applied to Redmart PDF invoices """
 
+import csv
+import json
 import logging
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby, takewhile
 import tomllib
-import glob
 from pathlib import Path
+import boto3
+import orjson
 from textractor import Textractor
 from textractor.data.constants import TextractFeatures
 from textractor.entities.table import Table
+from textractor.entities.table_cell import TableCell
 from textractor.entities.document import Document
 from textractor.entities.lazy_document import LazyDocument
-import numpy as np
+from textractor.parsers import response_parser
+from textractor.utils.text_utils import linearize_children
 
+#number of invoices processed concurrently, overridable in config.toml
+DEFAULT_MAX_WORKERS = 16
+
+#seconds to wait for all Textract job notifications, overridable in config.toml
+DEFAULT_NOTIFICATION_TIMEOUT = 3600
+
+#Textract new lines in cell values are replaced by spaces in the CSV export
+_NL_TABLE = str.maketrans({'\n': ' ', '\r': ' '})
+
+#known Redmart date formats, keyed by value shape: (has comma, has dash, starts with a letter)
+_DATE_FORMATS = {
+    (True, False, False): '%d %B, %Y',      #23 June, 2018
+    (True, False, True): '%A, %d %B, %Y',   #Friday, 22 June, 2018
+    (False, True, False): '%Y-%m-%d',       #2019-10-31
+}
+
+#keys of the invoice key/values that hold a date contain this word, e.g. "Invoice Date"
+_DATE_NEEDLE = 'date'
+
+#header found in the first row of the invoice details table
+_PRODUCT_NAME = 'product name'
+
+
+@lru_cache(maxsize=1024)
 def parse_redmart_date(value:str):
     """
     This function attempts to parse a string date into a datetime object,
@@ -24,20 +60,22 @@ def parse_redmart_date(value:str):
         DELIVERY TIME : Friday, 22 June, 2018
         Invoice Date: : 23 June, 2018
         Issue date: 2019-10-31
-    """
 
-    formats = ['%d %B, %Y', '%A, %d %B, %Y', '%Y-%m-%d']
+    The shape of the value is looked up in _DATE_FORMATS first so that only the matching
+    format is tried, the same date strings repeat across a document so results are cached.
+    """
+    v = value.strip()
 
-    for fmt in formats:
-        try:
-            d = datetime.strptime(value, fmt)
-            if d is not None:
-                return d
-        except ValueError:
-            continue
+    fmt = _DATE_FORMATS.get((',' in v, '-' in v, v[:1].isalpha()))
+    if fmt is None:
+        #no known shape, cheap rejection without calling strptime
+        return None
 
-    #no date was found
-    return None
+    try:
+        return datetime.strptime(v, fmt)
+    except ValueError:
+        #no date was found
+        return None
 
 
 
@@ -56,9 +94,8 @@ def locate_invoice_date(document:Document | LazyDocument) -> datetime | None:
     """
 
     for kv in document.key_values:
-        if 'date' in kv.key.text.lower():
-            t = kv.value.text.strip()
-            d = parse_redmart_date(t)
+        if _DATE_NEEDLE in kv.key.text.lower():
+            d = parse_redmart_date(kv.value.text)
             if d is not None:
                 return d
     #no date was found
@@ -75,23 +112,26 @@ def locate_invoice_table(tables: list[Table]) -> int:
     :return: index of the table, -1 if it count not be located
     """
     for i, t in enumerate(tables):
-        df = t.to_pandas()
-        row0 = df.values[0]
+        #table cells are sorted by row then column: stop reading at the end of the
+        #first row instead of building the whole table as a DataFrame
+        row0 = takewhile(lambda c: c.row_index == 1, t.table_cells)
 
-        #Product Name seems to always be in there
-        if next((s for s in row0 if 'Product Name'.lower() in s.lower()), None) is not None:
+        #Product Name seems to always be in there, possibly in a merged cell
+        if any(_PRODUCT_NAME in _cell_text(c).lower() for c in row0):
             return i
 
     return -1
 
 
 def process_invoice_file(input_file:str, extractor:Textractor,
-                         s3_upload_path:str) -> Document | LazyDocument:
+                         s3_upload_path:str,
+                         textract_polling_interval:float=1.0) -> Document | LazyDocument:
     """
     Process a local pdf invoice file, sending it to AWS Textract for analysis.
 
     :param file: the path to the invoice file to process
     :param s3_upload_path: a valid S3 bucket path that can be written by the AWS account
+    :param textract_polling_interval: seconds between two polls of the Textract job status
     :return: a Textractor Document object
     """
     document = extractor.start_document_analysis(
@@ -100,11 +140,203 @@ def process_invoice_file(input_file:str, extractor:Textractor,
         features=[TextractFeatures.TABLES, TextractFeatures.FORMS],
         save_image=False
         )
-    document.s3_polling_interval = 0.25
+    document.textract_polling_interval = textract_polling_interval
     return document
 
 
-def export_textract_table_to_csv(t:Table, output_file:str, document_date:datetime=None):
+def analysis_cache_file(input_file:Path, cache_dir:Path) -> Path:
+    """
+    Path of the cached Textract response for a local pdf invoice file.
+
+    :param input_file: the path to the invoice file
+    :param cache_dir: the folder holding the cached Textract responses
+    :return: the path of the JSON file, which may not exist yet
+
+    The file size and modification time are part of the name so that an invoice
+    replaced in the input folder is sent to Textract again.
+    """
+    st = input_file.stat()
+    return cache_dir / f'{input_file.stem}-{st.st_size}-{st.st_mtime_ns}.json'
+
+
+def load_analysis(input_file:Path, cache_dir:Path | None) -> Document | None:
+    """
+    Load the Textract response of a file previously saved with save_analysis.
+
+    :param input_file: the path to the invoice file
+    :param cache_dir: the folder holding the cached Textract responses, None to disable caching
+    :return: a Textractor Document object, or None if the response is not cached
+
+    An entry that cannot be parsed is removed and treated as not cached, so that the file
+    is sent to Textract again.
+    """
+    if cache_dir is None:
+        return None
+
+    cache_file = analysis_cache_file(input_file, cache_dir)
+    if not cache_file.exists():
+        return None
+
+    try:
+        return response_parser.parse(orjson.loads(cache_file.read_bytes())) # pylint: disable=no-member
+    except Exception as e: # pylint: disable=broad-exception-caught
+        logging.warning( "Ignoring unreadable cached Textract response %s: %r", cache_file, e )
+        cache_file.unlink(missing_ok=True)
+        return None
+
+
+def get_or_run_analysis(input_file:Path, extractor:Textractor, s3_upload_path:str,
+                        cache_dir:Path | None,
+                        textract_polling_interval:float=1.0) -> Document | LazyDocument:
+    """
+    Same as process_invoice_file, except that a Textract response previously saved with
+    save_analysis is reused instead of running a new (paid) Textract job.
+
+    :param input_file: the path to the invoice file to process
+    :param extractor: the Textractor used to send the file to AWS Textract
+    :param s3_upload_path: a valid S3 bucket path that can be written by the AWS account
+    :param cache_dir: the folder holding the cached Textract responses, None to disable caching
+    :param textract_polling_interval: seconds between two polls of the Textract job status
+    :return: a Textractor Document object
+    """
+    document = load_analysis(input_file, cache_dir)
+    if document is not None:
+        return document
+
+    return process_invoice_file(input_file=str(input_file), extractor=extractor,
+                                s3_upload_path=s3_upload_path,
+                                textract_polling_interval=textract_polling_interval)
+
+
+def save_analysis(document:Document | LazyDocument, input_file:Path, cache_dir:Path | None):
+    """
+    Save the raw Textract response of a document so that get_or_run_analysis can reuse it.
+    Nothing is written if caching is disabled or if the response is already cached.
+
+    The response is written to a temporary file first then renamed, so that an interrupted
+    run never leaves a truncated entry behind.
+
+    :param document: the Textractor document of the invoice file
+    :param input_file: the path to the invoice file
+    :param cache_dir: the folder holding the cached Textract responses, None to disable caching
+    """
+    if cache_dir is None:
+        return
+
+    cache_file = analysis_cache_file(input_file, cache_dir)
+    if cache_file.exists():
+        return
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(document.response)) # pylint: disable=no-member
+        os.replace(tmp_file, cache_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+def start_invoice_analysis(input_file:Path, s3_client, textract_client, s3_upload_path:str,
+                           notification_channel:dict) -> str:
+    """
+    Upload a local pdf invoice file to S3 and start its Textract analysis, with the job
+    completion published to an SNS topic instead of being polled.
+
+    :param input_file: the path to the invoice file to process
+    :param s3_client: a boto3 S3 client
+    :param textract_client: a boto3 Textract client
+    :param s3_upload_path: a valid S3 bucket path that can be written by the AWS account
+    :param notification_channel: the Textract NotificationChannel (SNSTopicArn and RoleArn)
+    :return: the Textract job id
+    """
+    #unique key, as Textractor does: a file with the same name uploaded by another run
+    #must not replace this one while Textract may still be reading it
+    bucket, _, prefix = s3_upload_path.removeprefix('s3://').partition('/')
+    key = f'{uuid.uuid4()}/{input_file.name}'
+    if prefix.strip('/'):
+        key = f'{prefix.strip("/")}/{key}'
+    s3_client.upload_file(str(input_file), bucket, key)
+
+    response = textract_client.start_document_analysis(
+        DocumentLocation={'S3Object': {'Bucket': bucket, 'Name': key}},
+        FeatureTypes=['TABLES', 'FORMS'],
+        NotificationChannel=notification_channel
+        )
+    return response['JobId']
+
+
+def wait_for_analysis_jobs(job_ids:set[str], sqs_client, queue_url:str,
+                           timeout:float=DEFAULT_NOTIFICATION_TIMEOUT):
+    """
+    Wait for Textract job completion notifications, read from the SQS queue subscribed
+    to the SNS topic of the notification channel.
+
+    :param job_ids: the ids of the Textract jobs to wait for
+    :param sqs_client: a boto3 SQS client
+    :param queue_url: the URL of the SQS queue
+    :param timeout: seconds after which to stop waiting for the jobs still pending
+    :return: an iterator of (job id, status) as jobs complete
+
+    The queue must be dedicated to this script, with one run at a time: every message
+    received is deleted. Duplicate deliveries, notifications left over from an interrupted
+    run and messages that are not Textract notifications would otherwise come back on
+    every later run.
+    """
+    pending = set(job_ids)
+    deadline = time.monotonic() + timeout
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logging.error( "Timed out waiting for Textract jobs %s", ', '.join(sorted(pending)) )
+            return
+
+        #long polling: the call returns as soon as a message is available
+        messages = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10,
+                                              WaitTimeSeconds=min(20, max(1, int(remaining)))
+                                              ).get('Messages', [])
+        for m in messages:
+            sqs_client.delete_message(QueueUrl=queue_url, ReceiptHandle=m['ReceiptHandle'])
+            try:
+                body = json.loads(m['Body'])
+                #SNS envelope, unless raw message delivery is enabled on the subscription
+                notification = json.loads(body['Message']) if 'Message' in body else body
+                job_id = notification.get('JobId')
+            except (ValueError, TypeError, AttributeError):
+                logging.warning( "Dropping SQS message %s: not a Textract notification",
+                                 m.get('MessageId') )
+                continue
+            if job_id in pending:
+                pending.remove(job_id)
+                yield job_id, notification.get('Status')
+            elif job_id not in job_ids:
+                logging.info( "Dropping notification for Textract job %s "
+                              "not started by this run", job_id )
+
+
+def get_analysis_document(job_id:str, textract_client) -> Document:
+    """
+    Fetch the result of a completed Textract analysis job, following the NextToken
+    pagination, as a Textractor document.
+
+    :param job_id: the Textract job id
+    :param textract_client: a boto3 Textract client
+    :return: a Textractor Document object
+    """
+    response = textract_client.get_document_analysis(JobId=job_id)
+    next_token = response.get('NextToken')
+    while next_token:
+        page = textract_client.get_document_analysis(JobId=job_id, NextToken=next_token)
+        response['Blocks'].extend(page['Blocks'])
+        next_token = page.get('NextToken')
+    response.pop('NextToken', None)
+
+    return response_parser.parse(response)
+
+
+def export_textract_table_to_csv(t:Table, output_file:str, document_date:datetime=None,
+                                 use_pandas:bool=False):
     """
     Export an AWS Textractor table to CSV; adding a new column "Date" filled with the 
     document date.
@@ -112,62 +344,260 @@ def export_textract_table_to_csv(t:Table, output_file:str, document_date:datetim
     :param t: the Textractor document table to convert to CSV
     :param output_file: the path to the file that will be written
     :param document_date: the date to fill in the newly added date column
+    :param use_pandas: build the rows through a pandas DataFrame instead of reading the
+        table cells directly
 
     Some very light processing of the table is done to make it ready for the next step.
     In particular, all the new lines are moved. AWS Textract tends to add new lines
     in cell values for no particular reason, which makes it difficult to have readable
     CSV.
     """
+    #date conversion to YYYY-MM-DD
+    document_date_str = ''
+    if document_date is not None:
+        document_date_str = document_date.date().isoformat()
+
+    if use_pandas:
+        rows = _table_rows_pandas(t, document_date_str)
+    else:
+        #same rows as to_pandas(use_columns=False): table cells grouped by row
+        rows = []
+        for _, cells in groupby(t.table_cells, key=lambda c: c.row_index):
+            row = ['' for _ in range(t.column_count)]
+            for c in cells:
+                row[c.col_index - 1] = _cell_text(c).translate(_NL_TABLE)
+            rows.append(row)
+
+        #header row is part of the cells: the date column starts with its header
+        for i, row in enumerate(rows):
+            row.append(document_date_str if i else 'Date')
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator='\n').writerows(rows)
+
+
+def _cell_text(c:TableCell) -> str:
+    """
+    Text of a table cell, as Textractor's to_pandas gives it: a merged cell has the text
+    of all its siblings in its top-left cell, the other cells of the merge are left empty.
+
+    :param c: the Textractor table cell
+    :return: the text of the cell
+    """
+    if not c.siblings:
+        return c.text
+
+    first_row, first_col, _, _ = c._get_merged_cell_range() # pylint: disable=protected-access
+    if c.row_index != first_row or c.col_index != first_col:
+        return ''
+
+    children = [child for sib in c.siblings for child in sib.children]
+    text, _ = linearize_children(children, no_new_lines=True)
+    return text
+
+
+def _table_rows_pandas(t:Table, document_date_str:str):
+    """
+    Rows of a Textractor table with the date column added, built through pandas.
+
+    :param t: the Textractor document table to convert
+    :param document_date_str: the YYYY-MM-DD date to fill in the newly added date column
+    :return: an iterator of row tuples, header row included
+    """
     #we force the header column to not be recognized as header this way
     #we can just remove the \r\n in the entire data including header column
     #downside is that we need to manually craft the first row
     #when adding the date to the dataframe
     df = t.to_pandas(use_columns=False)
-    df = df.replace(r'\n',' ', regex=True)
-    df = df.replace(r'\r',' ', regex=True)
+    for c in df.columns:
+        df[c] = df[c].map(lambda s: s.translate(_NL_TABLE) if isinstance(s, str) else s)
 
-    #date conversion to YYYY-MM-DD
-    document_date_str = ''
-    if document_date is not None:
-        document_date_str = document_date.strftime('%Y-%m-%d')
+    df['date'] = document_date_str
+    df.iat[0, df.columns.get_loc('date')] = 'Date'
 
-    arrd = np.full(shape=len(df), fill_value=document_date_str)
-    arrd = arrd.tolist()
-    arrd[0] = 'Date'
-    df['date'] = arrd
+    return df.itertuples(index=False, name=None)
 
-    df.to_csv(output_file, index=False, header=False)
 
+def _handle_one(file:Path, document:Document | LazyDocument, output_dir:Path,
+                cache_dir:Path | None=None) -> None:
+    """
+    Extraction pipeline for a single invoice whose Textract job has already been started:
+    date and table lookup, then CSV export to the output folder with the same name but as .csv
 
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
+    :param file: the path to the invoice file being processed
+    :param document: the Textractor document returned by get_or_run_analysis
+    :param output_dir: the folder where the CSV file is written
+    :param cache_dir: the folder holding the cached Textract responses, None to disable caching
+    """
+    out_file = output_dir / file.with_suffix('.csv').name
+
+    #accessing the document waits for the Textract job to complete
+    dt = locate_invoice_date(document)
+    save_analysis(document, file, cache_dir)
+    idx = locate_invoice_table(document.tables)
+    if idx >= 0:
+        export_textract_table_to_csv(document.tables[idx],
+                                     output_file=str(out_file),
+                                     document_date=dt)
+        if dt is None:
+            logging.warning( "File %s was processed without a date", file)
+        else:
+            logging.info( "File %s was processed successfully", file )
+
+    else:
+        logging.warning( "Script failed to locate an invoice detail list " \
+                            "table in file %s", file )
+
+
+def _submit_with_polling(ex:ThreadPoolExecutor, extractor:Textractor, aws_config:dict, # pylint: disable=too-many-arguments,too-many-positional-arguments
+                         input_dir:Path, output_dir:Path, cache_dir:Path | None,
+                         polling_interval:float) -> dict:
+    """
+    Start a Textract job for each pdf of the input folder and submit their processing,
+    Textractor polling each job until it completes.
+
+    :return: a dict of the processing futures to their input file
+    """
+    #Pass 1: upload and start a Textract job for each pdf in the input folder,
+    #so that all the jobs run concurrently on the AWS side
+    #Invoices already analyzed in a previous run are read from the cache instead
+    started = {ex.submit(get_or_run_analysis, input_file=file, extractor=extractor,
+                         s3_upload_path=aws_config['s3_upload_path'],
+                         cache_dir=cache_dir,
+                         textract_polling_interval=polling_interval): file
+               for file in input_dir.glob('*.pdf')}
+
+    #Pass 2: as jobs get started, wait for their results and place CSV output
+    #in output folder with the same name but as .csv
+    handled = {}
+    for future in as_completed(started):
+        try:
+            textractor_document = future.result()
+        except Exception: # pylint: disable=broad-exception-caught
+            logging.exception( "File %s could not be sent to Textract", started[future] )
+            continue
+        handled[ex.submit(_handle_one, started[future], textractor_document,
+                          output_dir, cache_dir)] = started[future]
+
+    return handled
 
+
+def _load_or_start_analysis(input_file:Path, cache_dir:Path | None, s3_client, # pylint: disable=too-many-arguments,too-many-positional-arguments
+                            textract_client, s3_upload_path:str,
+                            notification_channel:dict) -> tuple[Document | None, str | None]:
+    """
+    Load the cached Textract response of a file, or start its Textract analysis with
+    start_invoice_analysis if it is not cached.
+
+    :return: the cached document and None, or None and the Textract job id
+    """
+    document = load_analysis(input_file, cache_dir)
+    if document is not None:
+        return document, None
+
+    return None, start_invoice_analysis(input_file, s3_client, textract_client,
+                                        s3_upload_path, notification_channel)
+
+
+def _submit_with_notifications(ex:ThreadPoolExecutor, aws_config:dict, input_dir:Path, # pylint: disable=too-many-locals
+                               output_dir:Path, cache_dir:Path | None) -> dict:
+    """
+    Start a Textract job for each pdf of the input folder and submit their processing,
+    each job result being fetched once its completion is notified through SNS/SQS.
+
+    :return: a dict of the processing futures to their input file
+    """
+    session = boto3.Session(profile_name="default")
+    s3_client = session.client('s3')
+    textract_client = session.client('textract')
+    sqs_client = session.client('sqs')
+    notification_channel = {'SNSTopicArn': aws_config['sns_topic_arn'],
+                            'RoleArn': aws_config['sns_role_arn']}
+
+    #Invoices already analyzed in a previous run are read from the cache instead
+    started = {ex.submit(_load_or_start_analysis, file, cache_dir, s3_client, textract_client,
+                         aws_config['s3_upload_path'], notification_channel): file
+               for file in input_dir.glob('*.pdf')}
+
+    handled = {}
+    jobs = {}
+    for future in as_completed(started):
+        file = started[future]
+        try:
+            document, job_id = future.result()
+        except Exception: # pylint: disable=broad-exception-caught
+            logging.exception( "File %s could not be sent to Textract", file )
+            continue
+        if document is not None:
+            handled[ex.submit(_handle_one, file, document, output_dir, cache_dir)] = file
+        else:
+            jobs[job_id] = file
+
+    timeout = aws_config.get('notification_timeout', DEFAULT_NOTIFICATION_TIMEOUT)
+    for job_id, status in wait_for_analysis_jobs(set(jobs), sqs_client,
+                                                 aws_config['sqs_queue_url'], timeout):
+        file = jobs.pop(job_id)
+        if status != 'SUCCEEDED':
+            logging.warning( "Textract job %s ended with status %s for file %s",
+                             job_id, status, file )
+            continue
+        try:
+            document = get_analysis_document(job_id, textract_client)
+        except Exception: # pylint: disable=broad-exception-caught
+            logging.exception( "File %s could not be fetched from Textract", file )
+            continue
+        handled[ex.submit(_handle_one, file, document, output_dir, cache_dir)] = file
+
+    #jobs left are the ones whose notification never arrived
+    for job_id, file in jobs.items():
+        logging.error( "File %s was not processed: no notification for Textract job %s",
+                       file, job_id )
+
+    return handled
+
+
+def main(config_file:str="config.toml"):
+    """
+    Process each pdf invoice of the input folder into a CSV file of the output folder,
+    as set in the config file.
+
+    :param config_file: path to the TOML config file
+    """
     # Config file, contains the S3 upload bucket that is needed for AWS Textractor
     # Change this to adapt to your own AWS environment
-    with open("config.toml", "rb") as f:
+    with open(config_file, "rb") as f:
         config = tomllib.load(f)
 
-    #AWS Textractor
-    aws_extractor = Textractor(profile_name="default")
-
-    #Process each pdf in the input folder, place CSV output in output folder
-    #with the same name but as .csv
-    for file in glob.glob(config['data']['input_folder'] + "/*.pdf"):
-        out_file = config['data']['output_folder'] + '/' + Path(file).stem + '.csv'
-
-        textractor_document = process_invoice_file(input_file=file, extractor=aws_extractor,
-                                        s3_upload_path=config['aws']['s3_upload_path'])
-        dt = locate_invoice_date(textractor_document)
-        idx = locate_invoice_table(textractor_document.tables)
-        if idx >= 0:
-            export_textract_table_to_csv(textractor_document.tables[idx],
-                                         output_file=out_file,
-                                         document_date=dt)
-            if dt is None:
-                logging.warning( "File %s was processed without a date", file)
-            else:
-                logging.info( "File %s was processed successfully", file )
+    #The work is I/O bound (S3 upload, Textract polling) so files are processed
+    #concurrently; a failure on one file does not stop the batch
+    max_workers = config['data'].get('max_workers', DEFAULT_MAX_WORKERS)
 
+    #GetDocumentAnalysis is throttled at about 5 TPS and up to max_workers jobs are
+    #polled at the same time: space the polls so that they stay under that limit
+    polling_interval = max(1.0, max_workers / 5)
+
+    input_dir = Path(config['data']['input_folder'])
+    output_dir = Path(config['data']['output_folder'])
+    cache_dir = Path(config['data']['cache_folder']) if 'cache_folder' in config['data'] else None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        if 'sqs_queue_url' in config['aws']:
+            handled = _submit_with_notifications(ex, config['aws'], input_dir,
+                                                 output_dir, cache_dir)
         else:
-            logging.warning( "Script failed to locate an invoice detail list " \
-                                "table in file %s", file )
+            #AWS Textractor, shared by the workers: boto3 clients are thread safe and
+            #documents are resolved on a different thread than the one that started them
+            aws_extractor = Textractor(profile_name="default")
+            handled = _submit_with_polling(ex, aws_extractor, config['aws'], input_dir,
+                                           output_dir, cache_dir, polling_interval)
+
+        for future in as_completed(handled):
+            try:
+                future.result()
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.exception( "File %s could not be processed", handled[future] )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()